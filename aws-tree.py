@@ -1,87 +1,328 @@
 import boto3
 from collections import defaultdict
 import argparse
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from html import escape
+from botocore.awsrequest import AWSResponse
+from botocore.config import Config
 from botocore.exceptions import ClientError
 import tqdm
 
+# Shared by every client: enough pooled connections for the worker threads, adaptive retries to ride out
+# throttling, timeouts short enough that a stuck connection fails over to a retry instead of hanging,
+# and TCP keepalive so pooled connections survive the gaps between bursts of calls
+CLIENT_CONFIG = Config(
+    max_pool_connections=64,
+    retries={'max_attempts': 10, 'mode': 'adaptive'},
+    connect_timeout=5,
+    read_timeout=30,
+    tcp_keepalive=True
+)
+
+# Responses are kept on disk briefly so repeated runs against the same account skip the API calls
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'aws-tree')
+CACHE_TTL = 15 * 60
+# Only read-only operations are cached
+CACHEABLE_OPERATION_PREFIXES = ('Describe', 'List', 'Get')
+memo_responses = {}
+
+# Per-bucket S3 calls share one budget: at most 50 in flight, dispatched no faster than 100 per second
+S3_SEMAPHORE = threading.BoundedSemaphore(50)
+S3_MIN_INTERVAL = 1 / 100
+s3_rate_lock = threading.Lock()
+s3_last_call = 0.0
+
+# Static scaffolding around the generated <ul> tree in the HTML output
+HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<title>AWS Resources</title>
+<style>
+.tree {list-style-type: none;}
+.tree li {margin: 0; padding: 10px 5px 0 5px; position: relative;}
+.tree li::before {content: ''; left: -20px; position: absolute; top: 20px; width: 1px; height: calc(100% - 20px); background: #ccc;}
+.tree li::after {content: ''; position: absolute; top: 20px; left: -20px; width: 20px; height: 1px; background: #ccc;}
+.tree li:last-child::before {height: calc(100% - 20px);}
+.tree li:last-child::after {display: none;}
+.tree li .parent {cursor: pointer;}
+.tree li .parent::before {content: '+'; color: #aaa; display: inline-block; margin-right: 5px;}
+.tree li.open > .parent::before {content: '-';}
+.tree .children {display: none;}
+.tree .open > .children {display: block;}
+.red {color: red;}
+</style>
+</head>
+<body>
+<ul class='tree'>"""
+
+HTML_TAIL = """</ul>
+<script>
+function toggleNode(element) {
+    var parent = element.parentElement;
+    parent.classList.toggle('open');
+    var children = parent.querySelector('.children');
+    if (children) {
+        children.style.display = children.style.display === 'block' ? 'none' : 'block';
+    }
+}
+document.addEventListener('DOMContentLoaded', function() {
+    var parents = document.querySelectorAll('.parent');
+    parents.forEach(function(item) {
+        item.parentElement.classList.add('collapsed');
+    });
+});
+</script>
+</body>
+</html>
+"""
+
+@lru_cache(maxsize=None)
+def client_for(session, service):
+    return session.client(service, config=CLIENT_CONFIG)
+
+def enable_response_cache(client, profile, ttl=CACHE_TTL):
+    # Hooks the client's events rather than wrapping get_* functions so paginated calls are cached too.
+    # Responses are stored before botocore's own after-call handlers touch them, so replaying one
+    # from disk goes through exactly the same post-processing as a live response.
+    service = client.meta.service_model.service_name
+    region = client.meta.region_name
+    cache_dir = os.path.join(CACHE_DIR, profile or 'default', region or 'global', service)
+
+    def key_request(params, model, context, **kwargs):
+        if not model.name.startswith(CACHEABLE_OPERATION_PREFIXES):
+            return
+        key = json.dumps(params, sort_keys=True, default=str)
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        context['cache_path'] = os.path.join(cache_dir, f"{model.name}_{digest}.pickle")
+
+    def load_response(context, **kwargs):
+        path = context.get('cache_path')
+        if path is None:
+            return None
+        # Repeated calls within a run are answered from memory; each hit unpickles a fresh copy
+        data = memo_responses.get(path)
+        try:
+            if data is None and time.time() - os.path.getmtime(path) < ttl:
+                with open(path, 'rb') as cache_file:
+                    data = cache_file.read()
+                memo_responses[path] = data
+            if data is not None:
+                parsed = pickle.loads(data)
+                context['cache_hit'] = True
+                return AWSResponse(None, 200, {}, None), parsed
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass
+        return None
+
+    def store_response(http_response, parsed, context, **kwargs):
+        path = context.get('cache_path')
+        if path is None or context.get('cache_hit') or http_response.status_code >= 300:
+            return
+        data = pickle.dumps(parsed)
+        memo_responses[path] = data
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+            with os.fdopen(fd, 'wb') as cache_file:
+                cache_file.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    client.meta.events.register('before-parameter-build', key_request)
+    client.meta.events.register('before-call', load_response)
+    client.meta.events.register_first('after-call', store_response)
+
 def get_vpcs(ec2):
-    response = ec2.describe_vpcs()
-    return response['Vpcs']
+    paginator = ec2.get_paginator('describe_vpcs')
+    return [vpc for page in paginator.paginate(PaginationConfig={'PageSize': 1000}) for vpc in page['Vpcs']]
 
 def get_s3_buckets(s3):
     response = s3.list_buckets()
     return response['Buckets']
 
 def get_lambda_functions(lambda_client):
-    response = lambda_client.list_functions()
-    return response['Functions']
+    paginator = lambda_client.get_paginator('list_functions')
+    return [function for page in paginator.paginate(PaginationConfig={'PageSize': 50}) for function in page['Functions']]
+
+# Console URLs for Lambda event sources, keyed by the ARN's service and called with (region, resource).
+# DynamoDB sources are stream ARNs (table/<name>/stream/<timestamp>), so the table name is the second path segment.
+TRIGGER_URL_BUILDERS = {
+    'sqs': lambda region, queue_name: f"https://{region}.console.aws.amazon.com/sqs/v2/home?region={region}#/queues/https%3A%2F%2Fsqs.{region}.amazonaws.com%2F{queue_name}",
+    'dynamodb': lambda region, resource: f"https://{region}.console.aws.amazon.com/dynamodb/home?region={region}#tables:selected={resource.split('/')[1]}",
+    'kinesis': lambda region, stream_name: f"https://{region}.console.aws.amazon.com/kinesis/home?region={region}#/streams/details/{stream_name}/details"
+}
 
 def get_lambda_triggers(lambda_client, function_name):
-    response = lambda_client.list_event_source_mappings(FunctionName=function_name)
+    paginator = lambda_client.get_paginator('list_event_source_mappings')
     triggers = []
-    for mapping in response['EventSourceMappings']:
+    mappings = (mapping for page in paginator.paginate(FunctionName=function_name) for mapping in page['EventSourceMappings'])
+    for mapping in mappings:
         trigger_info = {'UUID': mapping['UUID'], 'EventSourceArn': mapping['EventSourceArn']}
-        # Adding URLs if available
-        if 'EventSourceArn' in mapping:
-            if mapping['EventSourceArn'].startswith('arn:aws:sqs:'):
-                region = mapping['EventSourceArn'].split(':')[3]
-                queue_name = mapping['EventSourceArn'].split(':')[-1]
-                trigger_info['URL'] = f"https://{region}.console.aws.amazon.com/sqs/v2/home?region={region}#/queues/https%3A%2F%2Fsqs.{region}.amazonaws.com%2F{queue_name}"
-            elif mapping['EventSourceArn'].startswith('arn:aws:dynamodb:'):
-                region = mapping['EventSourceArn'].split(':')[3]
-                table_name = mapping['EventSourceArn'].split(':')[-1]
-                trigger_info['URL'] = f"https://{region}.console.aws.amazon.com/dynamodb/home?region={region}#tables:selected={table_name}"
-            elif mapping['EventSourceArn'].startswith('arn:aws:kinesis:'):
-                region = mapping['EventSourceArn'].split(':')[3]
-                stream_name = mapping['EventSourceArn'].split(':')[-1]
-                trigger_info['URL'] = f"https://{region}.console.aws.amazon.com/kinesis/home?region={region}#/streams/details/{stream_name}/details"
+        # Adding URLs if available: split the ARN once and pick the console URL builder by service
+        arn_parts = mapping['EventSourceArn'].split(':', 5)
+        url_builder = TRIGGER_URL_BUILDERS.get(arn_parts[2]) if len(arn_parts) == 6 else None
+        if url_builder:
+            trigger_info['URL'] = url_builder(arn_parts[3], arn_parts[5])
         triggers.append(trigger_info)
     return triggers if triggers else ["None"]
 
 def get_app_gateways(client):
-    response = client.describe_load_balancers()
-    return response['LoadBalancers']
+    paginator = client.get_paginator('describe_load_balancers')
+    return [gateway for page in paginator.paginate(PaginationConfig={'PageSize': 400}) for gateway in page['LoadBalancers']]
 
 def get_api_gateways(api_client):
-    response = api_client.get_rest_apis()
-    return response['items']
-
-def get_ec2_instances(ec2):
-    response = ec2.describe_instances()
-    instances = []
-    for reservation in response['Reservations']:
-        for instance in reservation['Instances']:
-            instances.append(instance)
-    return instances
-
-def get_s3_bucket_info(s3, bucket_name):
-    # Get number of objects
-    objects = s3.list_objects_v2(Bucket=bucket_name)
-    object_count = objects['KeyCount']
-
-    # Check public access
-    bucket_acl = s3.get_bucket_acl(Bucket=bucket_name)
-    public_access = any(grant['Grantee'].get('URI') == 'http://acs.amazonaws.com/groups/global/AllUsers' for grant in bucket_acl['Grants'])
-
-    # Check HTTP accessibility
+    paginator = api_client.get_paginator('get_rest_apis')
+    return [api for page in paginator.paginate(PaginationConfig={'PageSize': 500}) for api in page['items']]
+
+def get_ec2_instances(ec2, vpc_ids=None):
+    paginator = ec2.get_paginator('describe_instances')
+    if vpc_ids is None:
+        pages = paginator.paginate(PaginationConfig={'PageSize': 1000})
+    else:
+        # Let EC2 do the VPC filtering (up to 200 values per filter) instead of shipping every instance back
+        pages = (page for ids in chunked(vpc_ids, 200)
+                 for page in paginator.paginate(Filters=[{'Name': 'vpc-id', 'Values': ids}], PaginationConfig={'PageSize': 1000}))
+    return [instance for page in pages for reservation in page['Reservations'] for instance in reservation['Instances']]
+
+def get_vpcs_and_instances(ec2):
+    vpcs = get_vpcs(ec2)
+    return vpcs, get_ec2_instances(ec2, [vpc['VpcId'] for vpc in vpcs])
+
+# The *_and_* helpers below queue each resource's follow-up lookup on the shared pool as soon as their own
+# listing returns, pairing every resource with its future, instead of waiting for the slowest listing
+def get_lambda_functions_and_triggers(lambda_client, pool):
+    functions = get_lambda_functions(lambda_client)
+    return [(function, pool.submit(get_lambda_triggers, lambda_client, function['FunctionName'])) for function in functions]
+
+def get_s3_buckets_and_info(s3, cloudwatch, sts, s3control, region, pool):
+    ignores_public_acls_future = pool.submit(get_account_ignores_public_acls, sts, s3control)
+    buckets = get_s3_buckets(s3)
+    if region:
+        # list_buckets covers every region; drop other regions' buckets before probing them through redirects
+        region_futures = [pool.submit(get_s3_bucket_region, s3, bucket) for bucket in buckets]
+        buckets = [bucket for bucket, future in zip(buckets, region_futures) if future.result() == region]
+    check_acls = not ignores_public_acls_future.result()
+    return [(bucket, pool.submit(get_s3_bucket_info, s3, cloudwatch, bucket['Name'], check_acls)) for bucket in buckets]
+
+def get_sns_topics_and_encryption(sns, pool):
+    topics = get_sns_topics(sns)
+    return [(topic, pool.submit(get_sns_encryption, sns, topic['TopicArn'])) for topic in topics]
+
+def get_sns_topics(sns):
+    paginator = sns.get_paginator('list_topics')
+    return [topic for page in paginator.paginate() for topic in page['Topics']]
+
+def get_sqs_queues(sqs):
+    paginator = sqs.get_paginator('list_queues')
+    return [queue_url for page in paginator.paginate(PaginationConfig={'PageSize': 1000}) for queue_url in page.get('QueueUrls', [])]
+
+def get_kinesis_streams(kinesis):
+    paginator = kinesis.get_paginator('list_streams')
+    return [stream for page in paginator.paginate() for stream in page['StreamNames']]
+
+def get_dynamodb_tables(dynamodb):
+    paginator = dynamodb.get_paginator('list_tables')
+    return [table for page in paginator.paginate() for table in page['TableNames']]
+
+def s3_call(method, **kwargs):
+    global s3_last_call
+    with S3_SEMAPHORE:
+        with s3_rate_lock:
+            wait = s3_last_call + S3_MIN_INTERVAL - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            s3_last_call = time.monotonic()
+        return method(**kwargs)
+
+def get_s3_object_count(s3, cloudwatch, bucket_name):
+    # S3 publishes a daily object count to CloudWatch, which is one call however big the bucket is.
+    # The window is pinned to whole days so the request (and its cache entry) is stable within a day.
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    try:
+        response = cloudwatch.get_metric_statistics(
+            Namespace='AWS/S3',
+            MetricName='NumberOfObjects',
+            Dimensions=[{'Name': 'BucketName', 'Value': bucket_name}, {'Name': 'StorageType', 'Value': 'AllStorageTypes'}],
+            StartTime=today - timedelta(days=2),
+            EndTime=today + timedelta(days=1),
+            Period=86400,
+            Statistics=['Average']
+        )
+        datapoints = response['Datapoints']
+    except ClientError:
+        datapoints = []
+    if datapoints:
+        return int(max(datapoints, key=lambda point: point['Timestamp'])['Average'])
+
+    # No metric yet (new bucket, another region or no CloudWatch access), so count the keys page by page
+    object_count = 0
+    list_kwargs = {'Bucket': bucket_name}
+    while True:
+        objects = s3_call(s3.list_objects_v2, **list_kwargs)
+        object_count += objects['KeyCount']
+        if not objects.get('IsTruncated'):
+            return object_count
+        list_kwargs['ContinuationToken'] = objects['NextContinuationToken']
+
+def get_s3_bucket_region(s3, bucket):
+    if 'BucketRegion' in bucket:
+        return bucket['BucketRegion']
+    location = s3_call(s3.get_bucket_location, Bucket=bucket['Name'])['LocationConstraint']
+    # us-east-1 buckets have no location constraint and the oldest eu-west-1 buckets report 'EU'
+    return {None: 'us-east-1', 'EU': 'eu-west-1'}.get(location, location)
+
+def get_account_ignores_public_acls(sts, s3control):
+    # With account-wide Block Public Access on for ACLs, no bucket ACL can make a bucket public
+    try:
+        account_id = sts.get_caller_identity()['Account']
+        config = s3control.get_public_access_block(AccountId=account_id)['PublicAccessBlockConfiguration']
+    except ClientError:
+        return False
+    return config.get('BlockPublicAcls', False) and config.get('IgnorePublicAcls', False)
+
+def get_s3_public_access(s3, bucket_name):
+    bucket_acl = s3_call(s3.get_bucket_acl, Bucket=bucket_name)
+    return any(grant['Grantee'].get('URI') == 'http://acs.amazonaws.com/groups/global/AllUsers' for grant in bucket_acl['Grants'])
+
+def get_s3_http_access(s3, bucket_name):
     try:
-        bucket_policy = s3.get_bucket_policy(Bucket=bucket_name)
-        http_access = 'http' in bucket_policy['Policy']
+        bucket_policy = s3_call(s3.get_bucket_policy, Bucket=bucket_name)
+        return 'http' in bucket_policy['Policy']
     except ClientError as e:
         if e.response['Error']['Code'] == 'NoSuchBucketPolicy':
-            http_access = False
-        else:
-            raise
+            return False
+        raise
 
-    # Check encryption
+def get_s3_encryption(s3, bucket_name):
     try:
-        encryption = s3.get_bucket_encryption(Bucket=bucket_name)
-        encryption_enabled = True
+        s3_call(s3.get_bucket_encryption, Bucket=bucket_name)
+        return True
     except ClientError as e:
         if e.response['Error']['Code'] == 'ServerSideEncryptionConfigurationNotFoundError':
-            encryption_enabled = False
-        else:
-            raise
+            return False
+        raise
+
+def get_s3_bucket_info(s3, cloudwatch, bucket_name, check_acl=True):
+    # The probes are independent, so issue them together rather than one after another
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        count_future = executor.submit(get_s3_object_count, s3, cloudwatch, bucket_name)
+        public_future = executor.submit(get_s3_public_access, s3, bucket_name) if check_acl else None
+        http_future = executor.submit(get_s3_http_access, s3, bucket_name)
+        encryption_future = executor.submit(get_s3_encryption, s3, bucket_name)
+        object_count = count_future.result()
+        public_access = public_future.result() if public_future else False
+        http_access = http_future.result()
+        encryption_enabled = encryption_future.result()
 
     return object_count, public_access, http_access, encryption_enabled
 
@@ -95,120 +336,115 @@ def get_sns_encryption(sns, topic_arn):
     except ClientError as e:
         return False
 
-def get_tags(client, resource_id, resource_type):
-    if resource_type == 'ec2':
-        response = client.describe_tags(Filters=[{'Name': 'resource-id', 'Values': [resource_id]}])
-        tags = {tag['Key']: tag['Value'] for tag in response['Tags']}
-    elif resource_type == 'elbv2':
-        response = client.describe_tags(ResourceArns=[resource_id])
-        tags = {tag['Key']: tag['Value'] for tag in response['TagDescriptions'][0]['Tags']}
-    elif resource_type == 'vpc':
-        response = client.describe_tags(Filters=[{'Name': 'resource-id', 'Values': [resource_id]}])
-        tags = {tag['Key']: tag['Value'] for tag in response['Tags']}
-    else:
-        tags = {}
+def get_all_tags(tagging_client):
+    # One paginated sweep returns the tags for every VPC, instance and load balancer in the region.
+    # Returns None if the Resource Groups Tagging API can't be used, so the caller can fall back to describe_tags.
+    tags = {}
+    paginator = tagging_client.get_paginator('get_resources')
+    pages = paginator.paginate(
+        ResourceTypeFilters=['ec2:instance', 'ec2:vpc', 'elasticloadbalancing:loadbalancer'],
+        PaginationConfig={'PageSize': 100}
+    )
+    try:
+        for page in pages:
+            for resource in page['ResourceTagMappingList']:
+                arn = resource['ResourceARN']
+                resource_tags = {tag['Key']: tag['Value'] for tag in resource['Tags']}
+                # EC2 resources are looked up by id (arn:aws:ec2:...:vpc/vpc-123), load balancers by ARN
+                if arn.split(':')[2] == 'ec2':
+                    tags[arn.split('/')[-1]] = resource_tags
+                else:
+                    tags[arn] = resource_tags
+    except ClientError:
+        return None
     return tags
 
-def clean_tree(tree):
-    keys_to_delete = []
-    for key, value in tree.items():
-        if isinstance(value, list) and not value:
-            keys_to_delete.append(key)
-        elif isinstance(value, dict):
-            clean_tree(value)
-            if not value:
-                keys_to_delete.append(key)
-    for key in keys_to_delete:
-        del tree[key]
-
-def generate_html_tree(tree, region):
-    html = "<!DOCTYPE html><html><head><title>AWS Resources</title>"
-    html += "<style>.tree {list-style-type: none;}"
-    html += ".tree li {margin: 0; padding: 10px 5px 0 5px; position: relative;}"
-    html += ".tree li::before {content: ''; left: -20px; position: absolute; top: 20px; width: 1px; height: calc(100% - 20px); background: #ccc;}"
-    html += ".tree li::after {content: ''; position: absolute; top: 20px; left: -20px; width: 20px; height: 1px; background: #ccc;}"
-    html += ".tree li:last-child::before {height: calc(100% - 20px);}"
-    html += ".tree li:last-child::after {display: none;}"
-    html += ".tree li .parent {cursor: pointer;}"
-    html += ".tree li .parent::before {content: '+'; color: #aaa; display: inline-block; margin-right: 5px;}"
-    html += ".tree li.open > .parent::before {content: '-';}"
-    html += ".tree .children {display: none;}"
-    html += ".tree .open > .children {display: block;}"
-    html += ".red {color: red;}"
-    html += "</style></head><body><ul class='tree'>"
-
-    def generate_html_node(node):
-        nonlocal html
-        if isinstance(node, dict):
-            for key, value in node.items():
-                if key == 'URL' and isinstance(value, str):
-                    html += f'<li><a href="{value}" target="_blank">{key}</a></li>'
-                elif isinstance(value, dict):
-                    is_red = value.get('is_red', False)
-                    class_name = 'red' if is_red else ''
-                    html += f"<li><span class='parent {class_name}' onclick='toggleNode(this)'>" + key + "</span>"
-                    html += "<ul class='children'>"
-                    generate_html_node(value)
-                    html += "</ul></li>"
-                elif isinstance(value, list):
-                    html += f"<li><span class='parent' onclick='toggleNode(this)'>" + key + "</span>"
-                    html += "<ul class='children'>"
-                    for item in value:
-                        generate_html_node(item)
-                    html += "</ul></li>"
-                elif key != 'is_red':
-                    class_name = 'red' if key == 'is_red' and value else ''
-                    html += f"<li class='{class_name}'>" + str(key) + ": " + str(value) + "</li>"
-        else:
-            html += "<li>" + str(node) + "</li>"
-
-    generate_html_node(tree)
-
-    html += "</ul><script>"
-    html += "function toggleNode(element) {"
-    html += "var parent = element.parentElement;"
-    html += "parent.classList.toggle('open');"
-    html += "var children = parent.querySelector('.children');"
-    html += "if (children) {"
-    html += "children.style.display = children.style.display === 'block' ? 'none' : 'block';"
-    html += "}"
-    html += "}"
-    html += "document.addEventListener('DOMContentLoaded', function() {"
-    html += "var parents = document.querySelectorAll('.parent');"
-    html += "parents.forEach(function(item) {"
-    html += "item.parentElement.classList.add('collapsed');"
-    html += "});"
-    html += "});"
-    html += "</script></body></html>"
-    return html
-
-def generate_ascii_tree(tree):
-    ascii_tree = ""
-
-    def traverse(node, level=0):
-        nonlocal ascii_tree
-        if isinstance(node, dict):
-            for key, value in node.items():
-                color = "\033[91m" if (key == 'is_red' and value) else ""
-                reset = "\033[0m" if color else ""
-                if key == 'Triggers' and value == ["None"]:
-                    ascii_tree += "|  " * level + "+--" + key + "\n"
-                elif key == 'URL' and isinstance(value, str):
-                    ascii_tree += f"|  " * level + "+--" + color + key + ": " + value + reset + "\n"
-                elif isinstance(value, dict):
-                    ascii_tree += f"|  " * level + "+--" + color + key + reset + "\n"
-                    traverse(value, level + 1)
-                elif isinstance(value, list):
-                    ascii_tree += f"|  " * level + "+--" + key + "\n"
-                    for item in value:
-                        traverse(item, level + 1)
-                elif key != 'is_red':
-                    ascii_tree += f"|  " * level + "+--" + color + str(key) + ": " + str(value) + reset + "\n"
-        else:
-            ascii_tree += "|  " * level + "+--" + str(node) + "\n"
+def get_all_ec2_tags(ec2, resource_ids):
+    tags = {resource_id: {} for resource_id in resource_ids}
+    paginator = ec2.get_paginator('describe_tags')
+    pages = paginator.paginate(Filters=[{'Name': 'resource-id', 'Values': resource_ids}], PaginationConfig={'PageSize': 1000})
+    for page in pages:
+        for tag in page['Tags']:
+            tags[tag['ResourceId']][tag['Key']] = tag['Value']
+    return tags
 
-    traverse(tree)
-    return ascii_tree
+def get_all_elbv2_tags(client, resource_arns):
+    response = client.describe_tags(ResourceArns=resource_arns)
+    return {description['ResourceArn']: {tag['Key']: tag['Value'] for tag in description['Tags']} for description in response['TagDescriptions']}
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def fetch_all_parallel(funcs_and_args):
+    # Each entry is name -> (func, *args); the calls are independent so run them side by side
+    with ThreadPoolExecutor(max_workers=len(funcs_and_args)) as executor:
+        futures = {name: executor.submit(func, *args) for name, (func, *args) in funcs_and_args.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+def write_html_tree(tree, region, out):
+    # The tree only holds plain dicts, lists and scalars, so the walkers use exact type checks.
+    # Both walk an explicit stack instead of recursing: entries are (key, value) pairs from a dict,
+    # (None, node) for the root and list items, or closing markup to emit once a subtree is done.
+    write = out.write
+    write(HTML_HEAD)
+    stack = [(None, tree)]
+    while stack:
+        entry = stack.pop()
+        if type(entry) is str:
+            write(entry)
+            continue
+        key, value = entry
+        if key is None:
+            if type(value) is dict:
+                stack.extend(reversed(value.items()))
+            else:
+                write("<li>" + escape(str(value)) + "</li>")
+        elif key == 'URL' and type(value) is str:
+            write(f'<li><a href="{escape(value)}" target="_blank">{key}</a></li>')
+        elif type(value) is dict:
+            is_red = value.get('is_red', False)
+            class_name = 'red' if is_red else ''
+            write(f"<li><span class='parent {class_name}' onclick='toggleNode(this)'>" + escape(key) + "</span>")
+            write("<ul class='children'>")
+            stack.append("</ul></li>")
+            stack.append((None, value))
+        elif type(value) is list:
+            write(f"<li><span class='parent' onclick='toggleNode(this)'>" + escape(key) + "</span>")
+            write("<ul class='children'>")
+            stack.append("</ul></li>")
+            stack.extend((None, item) for item in reversed(value))
+        elif key != 'is_red':
+            class_name = 'red' if key == 'is_red' and value else ''
+            write(f"<li class='{class_name}'>" + escape(str(key)) + ": " + escape(str(value)) + "</li>")
+    write(HTML_TAIL)
+
+def write_ascii_tree(tree, out):
+    # Stack entries carry the full "|  |  +--" prefix for their depth, built once per container
+    write = out.write
+    stack = [("+--", None, tree)]
+    while stack:
+        prefix, key, value = stack.pop()
+        if key is None:
+            if type(value) is dict:
+                stack.extend((prefix, child_key, child_value) for child_key, child_value in reversed(value.items()))
+            else:
+                write(prefix + str(value) + "\n")
+            continue
+        color = "\033[91m" if (key == 'is_red' and value) else ""
+        reset = "\033[0m" if color else ""
+        if key == 'Triggers' and value == ["None"]:
+            write(prefix + key + "\n")
+        elif key == 'URL' and type(value) is str:
+            write(prefix + color + key + ": " + value + reset + "\n")
+        elif type(value) is dict:
+            write(prefix + color + key + reset + "\n")
+            stack.append(("|  " + prefix, None, value))
+        elif type(value) is list:
+            write(prefix + key + "\n")
+            child_prefix = "|  " + prefix
+            stack.extend((child_prefix, None, item) for item in reversed(value))
+        elif key != 'is_red':
+            write(prefix + color + str(key) + ": " + str(value) + reset + "\n")
 
 def main():
     parser = argparse.ArgumentParser(description="Query AWS resources and display them in an HTML or ASCII tree diagram.")
@@ -217,6 +453,8 @@ def main():
     parser.add_argument("--config", help="Path to AWS config file")
     parser.add_argument("--format", choices=['html', 'ascii'], default='html', help="Output format (default: html)")
     parser.add_argument("--output", help="Output file name")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore responses cached by earlier runs")
+    parser.add_argument("--cache-ttl", type=int, default=CACHE_TTL, help="Seconds to reuse cached responses for (default: 900)")
     args = parser.parse_args()
 
     session_kwargs = {}
@@ -229,83 +467,129 @@ def main():
 
     session = boto3.Session(**session_kwargs)
 
-    ec2 = session.client('ec2')
-    s3 = session.client('s3')
-    lambda_client = session.client('lambda')
-    client = session.client('elbv2')
-    api_client = session.client('apigateway')
-    sns_client = session.client('sns')
-    sqs_client = session.client('sqs')
-    kinesis_client = session.client('kinesis')
-    dynamodb_client = session.client('dynamodb')
+    ec2 = client_for(session, 'ec2')
+    s3 = client_for(session, 's3')
+    lambda_client = client_for(session, 'lambda')
+    client = client_for(session, 'elbv2')
+    api_client = client_for(session, 'apigateway')
+    sns_client = client_for(session, 'sns')
+    sqs_client = client_for(session, 'sqs')
+    kinesis_client = client_for(session, 'kinesis')
+    dynamodb_client = client_for(session, 'dynamodb')
+    tagging_client = client_for(session, 'resourcegroupstaggingapi')
+    cloudwatch = client_for(session, 'cloudwatch')
+    sts_client = client_for(session, 'sts')
+    s3control_client = client_for(session, 's3control')
+
+    if not args.no_cache:
+        for service_client in (ec2, s3, lambda_client, client, api_client, sns_client, sqs_client, kinesis_client, dynamodb_client, tagging_client, cloudwatch, sts_client, s3control_client):
+            enable_response_cache(service_client, session.profile_name, args.cache_ttl)
 
     region = args.region if args.region else session.region_name
 
-    vpcs = get_vpcs(ec2)
-    s3_buckets = get_s3_buckets(s3)
-    lambda_functions = get_lambda_functions(lambda_client)
-    app_gateways = get_app_gateways(client)
-    api_gateways = get_api_gateways(api_client)
-    ec2_instances = get_ec2_instances(ec2)
-
-    tree = defaultdict(lambda: {
-        'Tags': {},
-        'Lambda Functions': [],
-        'App Gateways': [],
-        'API Gateways': [],
-        'EC2 Instances': []
+    # Per-resource lookups share one pool; the loops below collect them in order on the main thread
+    pool = ThreadPoolExecutor(max_workers=32)
+
+    resources = fetch_all_parallel({
+        'vpcs_and_instances': (get_vpcs_and_instances, ec2),
+        'bucket_infos': (get_s3_buckets_and_info, s3, cloudwatch, sts_client, s3control_client, region, pool),
+        'function_triggers': (get_lambda_functions_and_triggers, lambda_client, pool),
+        'app_gateways': (get_app_gateways, client),
+        'api_gateways': (get_api_gateways, api_client),
+        'topic_encryption': (get_sns_topics_and_encryption, sns_client, pool),
+        'sqs_queues': (get_sqs_queues, sqs_client),
+        'kinesis_streams': (get_kinesis_streams, kinesis_client),
+        'dynamodb_tables': (get_dynamodb_tables, dynamodb_client),
+        'tags': (get_all_tags, tagging_client)
     })
+    vpcs, ec2_instances = resources['vpcs_and_instances']
+    bucket_infos = resources['bucket_infos']
+    function_triggers = resources['function_triggers']
+    app_gateways = resources['app_gateways']
+    api_gateways = resources['api_gateways']
+    topic_encryption = resources['topic_encryption']
+    sqs_queues = resources['sqs_queues']
+    kinesis_streams = resources['kinesis_streams']
+    dynamodb_tables = resources['dynamodb_tables']
+
+    tree = {}
+
+    tags_by_id = resources['tags']
+    if tags_by_id is None:
+        # Fetch tags in batches (EC2 filters take up to 200 values, ELBv2 up to 20 ARNs) rather than per resource
+        ec2_ids = [vpc['VpcId'] for vpc in vpcs] + [instance['InstanceId'] for instance in ec2_instances]
+        gateway_arns = [gateway['LoadBalancerArn'] for gateway in app_gateways]
+        tag_futures = [pool.submit(get_all_ec2_tags, ec2, ids) for ids in chunked(ec2_ids, 200)]
+        tag_futures += [pool.submit(get_all_elbv2_tags, client, arns) for arns in chunked(gateway_arns, 20)]
+        tags_by_id = {}
+        for future in tag_futures:
+            tags_by_id.update(future.result())
+
+    # Console links only vary by resource name within a run, so build the region-specific part once
+    instance_url_prefix = f"https://console.aws.amazon.com/ec2/v2/home?region={region}#Instances:instanceId="
+    function_url_prefix = f"https://console.aws.amazon.com/lambda/home?region={region}#/functions/"
+    gateway_url_prefix = f"https://console.aws.amazon.com/ec2/v2/home?region={region}#LoadBalancers:LoadBalancerName="
+    vpc_url_prefix = f"https://console.aws.amazon.com/vpc/home?region={region}#vpcs:VpcId="
+    api_gateway_url_prefix = f"https://console.aws.amazon.com/apigateway/home?region={region}#/apis/"
+    bucket_url_prefix = "https://s3.console.aws.amazon.com/s3/buckets/"
+    topic_url_prefix = f"https://{region}.console.aws.amazon.com/sns/v3/home?region={region}#/topic/"
+    stream_url_prefix = f"https://{region}.console.aws.amazon.com/kinesis/home?region={region}#/streams/details/"
+    table_url_prefix = f"https://{region}.console.aws.amazon.com/dynamodb/home?region={region}#tables:selected="
+
+    # Group VPC-scoped resources in one pass each so every VPC node picks up its lists directly
+    instances_by_vpc = defaultdict(list)
+    for instance in tqdm.tqdm(ec2_instances, desc="Fetching EC2 Instances"):
+        instance_id = instance['InstanceId']
+        tags = tags_by_id.get(instance_id, {})
+        instance_url = instance_url_prefix + instance_id
+        instances_by_vpc[instance.get('VpcId')].append({instance_id: tags, 'URL': instance_url})
 
-    for vpc in tqdm.tqdm(vpcs, desc="Fetching VPCs"):
-        vpc_id = vpc['VpcId']
-        tags = get_tags(ec2, vpc_id, 'vpc')
-        vpc_url = f"https://console.aws.amazon.com/vpc/home?region={region}#vpcs:VpcId={vpc_id}"
-        tree[vpc_id]['Tags'] = tags
-        tree[vpc_id]['URL'] = vpc_url
-
-    for function in tqdm.tqdm(lambda_functions, desc="Fetching Lambda Functions"):
+    lambdas_by_vpc = defaultdict(list)
+    for function, triggers_future in tqdm.tqdm(function_triggers, desc="Fetching Lambda Functions"):
         function_name = function['FunctionName']
-        function_vpc = function.get('VpcConfig', {}).get('VpcId')
-        tags = get_tags(lambda_client, function['FunctionArn'], 'lambda')
-        function_url = f"https://console.aws.amazon.com/lambda/home?region={region}#/functions/{function_name}"
+        function_url = function_url_prefix + function_name
         function_info = {
             'Runtime': function['Runtime'],
-            'Triggers': get_lambda_triggers(lambda_client, function_name),
+            'Triggers': triggers_future.result(),
             'URL': function_url,
             'is_red': function['Runtime'] != 'nodejs20.x'
         }
-        if function_vpc and function_vpc in tree:
-            tree[function_vpc]['Lambda Functions'].append({function_name: function_info})
+        lambdas_by_vpc[function.get('VpcConfig', {}).get('VpcId')].append({function_name: function_info})
 
+    gateways_by_vpc = defaultdict(list)
     for gateway in tqdm.tqdm(app_gateways, desc="Fetching App Gateways"):
         gateway_name = gateway['LoadBalancerName']
-        gateway_vpc = gateway.get('VpcId')
-        tags = get_tags(client, gateway['LoadBalancerArn'], 'elbv2')
-        gateway_url = f"https://console.aws.amazon.com/ec2/v2/home?region={region}#LoadBalancers:LoadBalancerName={gateway_name}"
-        if gateway_vpc and gateway_vpc in tree:
-            tree[gateway_vpc]['App Gateways'].append({gateway_name: tags, 'URL': gateway_url})
+        tags = tags_by_id.get(gateway['LoadBalancerArn'], {})
+        gateway_url = gateway_url_prefix + gateway_name
+        gateways_by_vpc[gateway.get('VpcId')].append({gateway_name: tags, 'URL': gateway_url})
+
+    for vpc in tqdm.tqdm(vpcs, desc="Fetching VPCs"):
+        vpc_id = vpc['VpcId']
+        tags = tags_by_id.get(vpc_id, {})
+        vpc_url = vpc_url_prefix + vpc_id
+        # Only add sections that have something in them so the tree needs no cleanup pass
+        vpc_info = {}
+        if tags:
+            vpc_info['Tags'] = tags
+        if vpc_id in lambdas_by_vpc:
+            vpc_info['Lambda Functions'] = lambdas_by_vpc[vpc_id]
+        if vpc_id in gateways_by_vpc:
+            vpc_info['App Gateways'] = gateways_by_vpc[vpc_id]
+        if vpc_id in instances_by_vpc:
+            vpc_info['EC2 Instances'] = instances_by_vpc[vpc_id]
+        vpc_info['URL'] = vpc_url
+        tree[vpc_id] = vpc_info
 
     for api_gateway in tqdm.tqdm(api_gateways, desc="Fetching API Gateways"):
         api_gateway_id = api_gateway['id']
         api_gateway_name = api_gateway['name']
-        api_gateway_url = f"https://console.aws.amazon.com/apigateway/home?region={region}#/apis/{api_gateway_id}/resources"
-        if 'API Gateways' not in tree:
-            tree['API Gateways'] = []
-        tree['API Gateways'].append({api_gateway_name: {'ID': api_gateway_id, 'URL': api_gateway_url}})
-
-    for instance in tqdm.tqdm(ec2_instances, desc="Fetching EC2 Instances"):
-        instance_id = instance['InstanceId']
-        instance_vpc = instance['VpcId']
-        tags = get_tags(ec2, instance_id, 'ec2')
-        instance_url = f"https://console.aws.amazon.com/ec2/v2/home?region={region}#Instances:instanceId={instance_id}"
-        if instance_vpc and instance_vpc in tree:
-            tree[instance_vpc]['EC2 Instances'].append({instance_id: tags, 'URL': instance_url})
+        api_gateway_url = api_gateway_url_prefix + api_gateway_id + "/resources"
+        tree.setdefault('API Gateways', []).append({api_gateway_name: {'ID': api_gateway_id, 'URL': api_gateway_url}})
 
-    for bucket in tqdm.tqdm(s3_buckets, desc="Fetching S3 Buckets"):
+    for bucket, info_future in tqdm.tqdm(bucket_infos, desc="Fetching S3 Buckets"):
         bucket_name = bucket['Name']
-        tags = get_tags(s3, bucket_name, 's3')
-        bucket_url = f"https://s3.console.aws.amazon.com/s3/buckets/{bucket_name}"
-        object_count, public_access, http_access, encryption_enabled = get_s3_bucket_info(s3, bucket_name)
+        bucket_url = bucket_url_prefix + bucket_name
+        object_count, public_access, http_access, encryption_enabled = info_future.result()
         bucket_info = {
             'URL': bucket_url,
             'Object Count': object_count,
@@ -315,49 +599,33 @@ def main():
         }
         if not encryption_enabled or http_access:
             bucket_info['is_red'] = True
-        if 'S3 Buckets' not in tree:
-            tree['S3 Buckets'] = []
-        tree['S3 Buckets'].append({bucket_name: bucket_info})
+        tree.setdefault('S3 Buckets', []).append({bucket_name: bucket_info})
 
-    sns_topics = sns_client.list_topics()['Topics']
-    tree['SNS'] = []
-    for topic in tqdm.tqdm(sns_topics, desc="Fetching SNS Topics"):
+    for topic, encryption_future in tqdm.tqdm(topic_encryption, desc="Fetching SNS Topics"):
         topic_arn = topic['TopicArn']
-        topic_url = f"https://{region}.console.aws.amazon.com/sns/v3/home?region={region}#/topic/{topic_arn}"
-        encryption_enabled = get_sns_encryption(sns_client, topic_arn)
+        topic_url = topic_url_prefix + topic_arn
+        encryption_enabled = encryption_future.result()
         topic_info = {
             'URL': topic_url,
             'Encryption Enabled': encryption_enabled
         }
         if not encryption_enabled:
             topic_info['is_red'] = True
-        tree['SNS'].append({topic_arn: topic_info})
+        tree.setdefault('SNS', []).append({topic_arn: topic_info})
+    pool.shutdown()
 
-    sqs_queues = sqs_client.list_queues().get('QueueUrls', [])
-    tree['SQS'] = []
     for queue_url in tqdm.tqdm(sqs_queues, desc="Fetching SQS Queues"):
-        tree['SQS'].append({queue_url: {'URL': queue_url}})
+        tree.setdefault('SQS', []).append({queue_url: {'URL': queue_url}})
 
-    kinesis_streams = kinesis_client.list_streams()['StreamNames']
-    tree['Kinesis'] = []
     for stream in tqdm.tqdm(kinesis_streams, desc="Fetching Kinesis Streams"):
-        stream_url = f"https://{region}.console.aws.amazon.com/kinesis/home?region={region}#/streams/details/{stream}/details"
-        tree['Kinesis'].append({stream: {'URL': stream_url}})
+        stream_url = stream_url_prefix + stream + "/details"
+        tree.setdefault('Kinesis', []).append({stream: {'URL': stream_url}})
 
-    dynamodb_tables = dynamodb_client.list_tables()['TableNames']
-    tree['DynamoDB'] = []
     for table in tqdm.tqdm(dynamodb_tables, desc="Fetching DynamoDB Tables"):
-        table_url = f"https://{region}.console.aws.amazon.com/dynamodb/home?region={region}#tables:selected={table}"
-        tree['DynamoDB'].append({table: {'URL': table_url}})
-
-    clean_tree(tree)
+        table_url = table_url_prefix + table
+        tree.setdefault('DynamoDB', []).append({table: {'URL': table_url}})
 
-    if args.format == 'html':
-        output_content = generate_html_tree(tree, region)
-        file_extension = 'html'
-    else:
-        output_content = generate_ascii_tree(tree)
-        file_extension = 'txt'
+    file_extension = 'html' if args.format == 'html' else 'txt'
 
     # Use AWS profile name for output filename if not provided
     if args.output:
@@ -367,8 +635,12 @@ def main():
     else:
         output_filename = 'output.' + file_extension
 
-    with open(output_filename, 'w') as output_file:
-        output_file.write(output_content)
+    # Stream the tree straight into a large write buffer rather than building the whole document in memory
+    with open(output_filename, 'w', encoding='utf-8', buffering=1 << 20) as output_file:
+        if args.format == 'html':
+            write_html_tree(tree, region, output_file)
+        else:
+            write_ascii_tree(tree, output_file)
 
 if __name__ == "__main__":
     main()